@@ -0,0 +1,94 @@
+from __future__ import annotations
+import os, json
+from typing import Dict
+
+DEFAULT_PATH = "~/.local/state/rpios-setup/checkpoint.json"
+
+class Checkpoint:
+    """Durable record of `apply` progress so an interrupted run can be resumed.
+
+    Progress is tracked per task (completed or not) and per unit inside a task
+    (a package batch, a Pi-Apps app, an extension, a file, ...). Every change is
+    written to disk and fsync'd before the call returns, so after a power loss
+    the file shows every finished unit plus at most one unit that was in flight.
+    """
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.resumed = False
+        self.tasks: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> "Checkpoint":
+        """Load a previous run's checkpoint; start fresh if missing, unreadable or for another config."""
+        cp = cls(path, fingerprint)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cp
+        if not isinstance(data, dict) or not isinstance(data.get("tasks"), dict):
+            return cp
+        if not all(isinstance(t, dict) for t in data["tasks"].values()):
+            return cp
+        if data.get("fingerprint") == fingerprint:
+            cp.tasks = data.get("tasks", {})
+            cp.resumed = True
+        return cp
+
+    def _task(self, task: str) -> dict:
+        return self.tasks.setdefault(task, {"complete": False, "done": [], "in_flight": None})
+
+    def task_done(self, task: str) -> bool:
+        return self.tasks.get(task, {}).get("complete", False)
+
+    def is_done(self, task: str, unit: str) -> bool:
+        return unit in self.tasks.get(task, {}).get("done", [])
+
+    def in_flight(self, task: str) -> str | None:
+        return self.tasks.get(task, {}).get("in_flight")
+
+    def begin(self, task: str, unit: str):
+        self._task(task)["in_flight"] = unit
+        self.save()
+
+    def done(self, task: str, unit: str):
+        t = self._task(task)
+        if unit not in t["done"]:
+            t["done"].append(unit)
+        t["in_flight"] = None
+        self.save()
+
+    def abort(self, task: str):
+        """The in-flight unit failed; clear it so it isn't mistaken for an interruption."""
+        self._task(task)["in_flight"] = None
+        self.save()
+
+    def complete_task(self, task: str):
+        t = self._task(task)
+        t["complete"] = True
+        t["in_flight"] = None
+        self.save()
+
+    def save(self):
+        d = os.path.dirname(self.path) or "."
+        os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "tasks": self.tasks}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # fsync the directory too so the rename itself survives a power loss
+        fd = os.open(d, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def clear(self):
+        self.tasks = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
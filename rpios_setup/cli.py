@@ -1,9 +1,10 @@
 from __future__ import annotations
-import json
+import json, os
 from pathlib import Path
 from typing import List
 import typer
 
+from .checkpoint import Checkpoint, DEFAULT_PATH
 from .engine import Planner
 from .facts import detect_facts
 
@@ -34,6 +35,9 @@ def existing_file(value: str) -> Path:
 def parse_tags(tags: str) -> List[str]:
     return [t.strip() for t in tags.split(",") if t.strip()]
 
+def show_progress(line: str):
+    typer.secho(f"    | {line}", dim=True)
+
 # ---------- Commands ----------
 
 @app.command()
@@ -75,31 +79,66 @@ def apply(
     profile: str = typer.Option("base", "--profile", "-p", help="Profile name to merge (e.g., base, dev)"),
     dry_run: bool = typer.Option(False, "--dry-run", help="Show what would change, without applying"),
     tags: str = typer.Option("", "--tags", "-t", help="Comma-separated tags to limit tasks (e.g., apt,apps,desktop)"),
+    progress: bool = typer.Option(True, "--progress/--no-progress", help="Show output of long-running commands as it arrives"),
+    log_dir: Path = typer.Option(None, "--log-dir", help="Write the full output of each task to <log-dir>/<task>.log"),
+    resume: bool = typer.Option(False, "--resume", help="Continue an interrupted run from its last checkpoint"),
+    state_file: Path = typer.Option(DEFAULT_PATH, "--state-file", help="Where apply records its progress"),
 ):
     """
     Apply the desired state from the config/profile to the current machine.
     """
     tag_list = parse_tags(tags)
     plan = Planner.from_config(str(config), profile, tags=tag_list)
+    for task in plan.tasks:
+        if progress:
+            task.progress = show_progress
+        if log_dir:
+            task.log_dir = str(log_dir)
 
     results = []
+    checkpoint = None
     if dry_run:
         typer.echo("Dry-run: showing checks only. No changes will be made.\n")
+    else:
+        path = os.path.expanduser(str(state_file))
+        if resume:
+            checkpoint = Checkpoint.load(path, plan.fingerprint())
+            if not checkpoint.resumed:
+                typer.echo("No checkpoint for this config; starting from the beginning.\n")
+        else:
+            checkpoint = Checkpoint(path, plan.fingerprint())
+            checkpoint.clear()
+        for task in plan.tasks:
+            task.checkpoint = checkpoint
 
     for task in plan.tasks:
         if plan.tags and plan.tags.isdisjoint(task.tags):
             continue
+        if checkpoint and checkpoint.task_done(task.name):
+            typer.echo(f"[RESUME] {task.name}: completed in previous run")
+            continue
+        in_flight = task.interrupted()
+        if in_flight:
+            typer.echo(f"[RESUME] {task.name}: redoing interrupted {in_flight}")
         ok, changed, msg = task.check()
         typer.echo(f"[CHECK] {task.name}: {'present' if ok else 'absent'} | {msg}")
-        if not dry_run and not ok:
+        # check() can't always tell a half-finished unit from a finished one, so always apply
+        if not dry_run and (not ok or in_flight):
             ok2, msg2 = task.apply()
+            task.invalidate()
             status = "CHANGED" if ok2 else "FAILED"
             typer.echo(f"[APPLY] {task.name}: {status} | {msg2}")
             results.append((task.name, ok2, msg2))
+            ok = ok2
+        if checkpoint and ok:
+            checkpoint.complete_task(task.name)
 
     typer.echo("\nDone.")
     if any(not r[1] for r in results):
         raise typer.Exit(code=1)
+    # a --tags run may leave other tasks' progress in the checkpoint; keep it for --resume
+    if checkpoint and all(checkpoint.task_done(t.name) for t in plan.tasks):
+        checkpoint.clear()
 
 
 @app.command()
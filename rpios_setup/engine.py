@@ -1,5 +1,5 @@
 from __future__ import annotations
-import os, yaml, copy
+import os, yaml, copy, json
 from typing import Any, List, Dict
 from .tasks.apt_present import AptPresent
 from .tasks.piapps_present import PiAppsPresent
@@ -9,12 +9,15 @@ from .tasks.desktop_lxqt import DesktopLXQt
 from .tasks.wallpaper_asset import WallpaperAsset
 from .tasks.raspi_config import RaspiConfig
 from .tasks.vscode_extensions import VSCodeExtensions
-from .utils import expand
+from .tasks.base import Snapshot
+from .utils import expand, sha256_of_text
 
 class Planner:
     def __init__(self, cfg: dict, tags: List[str] | None = None):
         self.cfg = cfg
         self.tags = set([t for t in (tags or []) if t])
+        # Shared by all tasks so apply() can reuse what check() already probed
+        self.snapshot = Snapshot()
         self.tasks = self._build_tasks(cfg)
 
     @classmethod
@@ -34,22 +37,26 @@ class Planner:
     def _build_tasks(self, cfg: dict):
         tasks = []
         # Core system settings
-        tasks.append(RaspiConfig(cfg, tags={"system"}))
+        tasks.append(RaspiConfig(cfg, tags={"system"}, snapshot=self.snapshot))
         # Services
-        tasks.append(SystemdManage(cfg, tags={"system","services"}))
+        tasks.append(SystemdManage(cfg, tags={"system","services"}, snapshot=self.snapshot))
         # APT
-        tasks.append(AptPresent(cfg, tags={"apt","apps"}))
+        tasks.append(AptPresent(cfg, tags={"apt","apps"}, snapshot=self.snapshot))
         # Desktop
-        tasks.append(DesktopLXQt(cfg, tags={"desktop"}))
-        tasks.append(WallpaperAsset(cfg, tags={"desktop","files"}))
+        tasks.append(DesktopLXQt(cfg, tags={"desktop"}, snapshot=self.snapshot))
+        tasks.append(WallpaperAsset(cfg, tags={"desktop","files"}, snapshot=self.snapshot))
         # Files
-        tasks.append(FilePresent(cfg, tags={"files"}))
+        tasks.append(FilePresent(cfg, tags={"files"}, snapshot=self.snapshot))
         # Pi-Apps
-        tasks.append(PiAppsPresent(cfg, tags={"apps","piapps"}))
+        tasks.append(PiAppsPresent(cfg, tags={"apps","piapps"}, snapshot=self.snapshot))
         # VSCode Extensions
-        tasks.append(VSCodeExtensions(cfg, tags={"apps","vscode"}))
+        tasks.append(VSCodeExtensions(cfg, tags={"apps","vscode"}, snapshot=self.snapshot))
         return tasks
 
+    def fingerprint(self) -> str:
+        """Hash of the merged config, used to tell whether a checkpoint belongs to this plan."""
+        return sha256_of_text(json.dumps(self.cfg, sort_keys=True, default=str))
+
     def preflight(self):
         pass
 
@@ -5,6 +5,8 @@ from ..utils import run
 
 class AptPresent(Task):
     name = "apt_present"
+    # apt may install the VS Code CLI itself
+    invalidates = {"vscode_extensions"}
 
     def check(self) -> Tuple[bool, bool, str]:
         pkgs = self.cfg.get("apt", {}).get("packages", {}).get("present", [])
@@ -12,19 +14,42 @@ class AptPresent(Task):
             return True, False, "no packages requested"
         missing = []
         for p in pkgs:
-            rc, _, _ = run(f"dpkg -s {p} >/dev/null 2>&1")
-            if rc != 0:
+            # dpkg -s also succeeds for packages left unpacked or half-configured
+            rc, out, _ = run(f"dpkg-query -W -f='${{Status}}' {p} 2>/dev/null")
+            if rc != 0 or out != "install ok installed":
                 missing.append(p)
+        self.observe("missing", missing)
         if missing:
             return False, True, f"missing: {', '.join(missing)}"
         return True, False, "all packages present"
 
     def apply(self) -> Tuple[bool, str]:
         aptcfg = self.cfg.get("apt", {})
-        if aptcfg.get("update", True):
-            run("sudo apt-get update")
+        if (self.interrupted() or "").startswith("install:"):
+            # an install was cut off; dpkg refuses to do anything until it is finished
+            rc, out, err = self.stream("sudo dpkg --configure -a")
+            if rc != 0:
+                # leave the batch in flight: dpkg is still interrupted and --resume must retry this
+                return False, err or "dpkg --configure -a failed"
+        if aptcfg.get("update", True) and self.pending("update"):
+            self.begin("update")
+            rc, _, _ = self.stream("sudo apt-get update")
+            if rc == 0:
+                self.finish("update")
+            else:
+                self.fail("update")
         pkgs = aptcfg.get("packages", {}).get("present", [])
+        if self.has_observed("missing"):
+            pkgs = self.observed("missing")
         if not pkgs:
             return True, "nothing to install"
-        rc, out, err = run("sudo apt-get install -y " + " ".join(pkgs))
+        batch = "install:" + " ".join(pkgs)
+        if not self.pending(batch):
+            return True, f"installed: {', '.join(pkgs)}"
+        self.begin(batch)
+        rc, out, err = self.stream("sudo apt-get install -y " + " ".join(pkgs))
+        if rc == 0:
+            self.finish(batch)
+        else:
+            self.fail(batch)
         return (rc == 0, err if rc else f"installed: {', '.join(pkgs)}")
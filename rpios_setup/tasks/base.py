@@ -1,11 +1,51 @@
 from __future__ import annotations
-from typing import Tuple, Set
+import os
+from typing import Any, Callable, Dict, Tuple, Set
+from ..checkpoint import Checkpoint
+from ..utils import run_stream
+
+_MISSING = object()
+
+class Snapshot:
+    """Per-run record of what each task observed during check(), keyed by task name.
+
+    apply() reads it back instead of probing the system again. Entries are
+    dropped with invalidate() once a task has changed the state they describe.
+    """
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, owner: str, key: str, value: Any) -> Any:
+        self._data.setdefault(owner, {})[key] = value
+        return value
+
+    def get(self, owner: str, key: str, default: Any = None) -> Any:
+        return self._data.get(owner, {}).get(key, default)
+
+    def invalidate(self, *owners: str):
+        """Forget observations for the given tasks (all tasks if none given)."""
+        if not owners:
+            self._data.clear()
+        for owner in owners:
+            self._data.pop(owner, None)
 
 class Task:
     name = "task"
-    def __init__(self, cfg: dict, tags: Set[str] | None = None):
+    # Names of other tasks whose observations go stale when this task applies.
+    # The CLI checks and applies one task at a time, in plan order, so this only
+    # matters to callers that run every check() before any apply().
+    invalidates: Set[str] = set()
+    # Set by the CLI: receives output lines of long commands as they arrive.
+    progress: Callable[[str], None] | None = None
+    # Set by the CLI: directory for per-task logs with the full command output.
+    log_dir: str | None = None
+    # Set by the CLI: durable per-unit progress so apply can resume after an interruption.
+    checkpoint: Checkpoint | None = None
+
+    def __init__(self, cfg: dict, tags: Set[str] | None = None, snapshot: Snapshot | None = None):
         self.cfg = cfg
         self.tags = tags or set()
+        self.snapshot = snapshot or Snapshot()
 
     def check(self) -> Tuple[bool, bool, str]:
         """Return (ok/present, changed?, message). `changed` here is informational."""
@@ -14,9 +54,50 @@ class Task:
     def apply(self) -> Tuple[bool, str]:
         raise NotImplementedError
 
+    def stream(self, cmd: str) -> Tuple[int, str, str]:
+        """Run a long, chatty command with bounded memory (see utils.run_stream)."""
+        log_path = os.path.join(self.log_dir, f"{self.name}.log") if self.log_dir else None
+        return run_stream(cmd, on_line=self.progress, log_path=log_path)
+
+    def pending(self, unit: str) -> bool:
+        """False if a previous, interrupted run already finished this unit."""
+        return not (self.checkpoint and self.checkpoint.is_done(self.name, unit))
+
+    def interrupted(self) -> str | None:
+        """The unit an interrupted run was working on when it stopped, if any."""
+        return self.checkpoint.in_flight(self.name) if self.checkpoint else None
+
+    def begin(self, unit: str):
+        if self.checkpoint:
+            self.checkpoint.begin(self.name, unit)
+
+    def finish(self, unit: str):
+        if self.checkpoint:
+            self.checkpoint.done(self.name, unit)
+
+    def fail(self, unit: str):
+        """The unit started with begin() failed; it stays pending but is no longer in flight."""
+        if self.checkpoint:
+            self.checkpoint.abort(self.name)
+
+    def observe(self, key: str, value: Any) -> Any:
+        """Record something check() probed so apply() can reuse it."""
+        return self.snapshot.record(self.name, key, value)
+
+    def observed(self, key: str, default: Any = None) -> Any:
+        return self.snapshot.get(self.name, key, default)
+
+    def has_observed(self, key: str) -> bool:
+        return self.snapshot.get(self.name, key, _MISSING) is not _MISSING
+
+    def invalidate(self):
+        """Drop this task's observations and those of the tasks it affects."""
+        self.snapshot.invalidate(self.name, *self.invalidates)
+
     def run(self):
         ok, _, msg = self.check()
         if ok:
             return {"task": self.name, "changed": False, "msg": msg}
         ok2, msg2 = self.apply()
+        self.invalidate()
         return {"task": self.name, "changed": ok2, "msg": msg2}
@@ -23,15 +23,32 @@ class FilePresent(Task):
         items = self.cfg.get("files", [])
         if not items:
             return True, "nothing to write"
+        deployed = 0
         for it in items:
             src = it["src"]
             dest = expand(it["dest"])
             mode = it.get("mode", "0644")
             backup = it.get("backup", True)
+            unit = f"file:{dest}"
+            if not self.pending(unit):
+                continue
+            self.begin(unit)
             os.makedirs(os.path.dirname(dest), exist_ok=True)
-            if os.path.exists(dest) and backup:
-                bak = dest + ".bak"
-                shutil.copy2(dest, bak)
-            shutil.copy2(src, dest)
-            ensure_mode(dest, int(mode, 8))
-        return True, f"deployed {len(items)} file(s)"
+            # The backup is its own unit: once it has been taken, a resumed run must not
+            # overwrite it with whatever the interrupted copy left in dest.
+            if os.path.exists(dest) and backup and self.pending(f"backup:{dest}"):
+                self._copy(dest, dest + ".bak")
+                self.finish(f"backup:{dest}")
+                self.begin(unit)
+            self._copy(src, dest, int(mode, 8))
+            self.finish(unit)
+            deployed += 1
+        return True, f"deployed {deployed} file(s)"
+
+    def _copy(self, src, dest, mode=None):
+        # copy next to dest and rename, so an interruption never leaves a partial file
+        tmp = dest + ".tmp"
+        shutil.copy2(src, tmp)
+        if mode is not None:
+            ensure_mode(tmp, mode)
+        os.replace(tmp, dest)
@@ -6,16 +6,18 @@ from ..utils import run, expand, which
 
 class PiAppsPresent(Task):
     name = "piapps_present"
+    # Pi-Apps may install the VS Code CLI itself
+    invalidates = {"vscode_extensions"}
 
     def _ensure_piapps(self):
         home = expand("~")
         path = os.path.join(home, ".local/share/pi-apps")
         if not os.path.exists(path):
             # install
-            run("git clone https://github.com/Botspot/pi-apps ~/.local/share/pi-apps", check=False)
+            self.stream("git clone https://github.com/Botspot/pi-apps ~/.local/share/pi-apps")
         # update quietly
         if os.path.exists(path):
-            run("cd ~/.local/share/pi-apps && git pull --ff-only", check=False)
+            self.stream("cd ~/.local/share/pi-apps && git pull --ff-only")
         return os.path.join(path, "pi-apps")
 
     def check(self):
@@ -30,6 +32,7 @@ class PiAppsPresent(Task):
             marker = os.path.join(base, app, "installed")
             if not os.path.exists(marker):
                 missing.append(app)
+        self.observe("missing", missing)
         if missing:
             return False, True, f"missing: {', '.join(missing)}"
         return True, False, "all pi-apps present"
@@ -37,16 +40,25 @@ class PiAppsPresent(Task):
     def apply(self) -> Tuple[bool, str]:
         cfg = self.cfg.get("piapps", {})
         apps = cfg.get("apps", [])
+        if self.has_observed("missing"):
+            apps = self.observed("missing")
         if not apps:
             return True, "nothing to install"
         binpath = self._ensure_piapps()
         ok = True
         msgs = []
         for app in apps:
-            rc, out, err = run(f'bash {binpath} install "{app}"')
+            unit = f"app:{app}"
+            if not self.pending(unit):
+                msgs.append(f"{app}: installed (resumed)")
+                continue
+            self.begin(unit)
+            rc, out, err = self.stream(f'bash {binpath} install "{app}"')
             if rc != 0:
+                self.fail(unit)
                 ok = False
                 msgs.append(f"{app}: {err or 'install failed'}")
             else:
+                self.finish(unit)
                 msgs.append(f"{app}: installed")
         return ok, "; ".join(msgs)
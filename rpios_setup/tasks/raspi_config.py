@@ -24,37 +24,58 @@ class RaspiConfig(Task):
 
     def apply(self):
         msgs = []
+        ok = True
         # hostname
         desired = self.cfg.get("hostname")
-        if desired:
-            run(f"echo {desired} | sudo tee /etc/hostname >/dev/null")
-            run(f"sudo hostnamectl set-hostname {desired}")
-            msgs.append(f"hostname->{desired}")
+        if desired and self.pending("hostname"):
+            self.begin("hostname")
+            rcs = []
+            rcs.append(run(f"echo {desired} | sudo tee /etc/hostname >/dev/null")[0])
+            rcs.append(run(f"sudo hostnamectl set-hostname {desired}")[0])
+            ok &= self._record("hostname", f"hostname->{desired}", rcs, msgs)
         # timezone
         tz = self.cfg.get("timezone")
-        if tz:
-            run(f"sudo timedatectl set-timezone {tz}")
-            msgs.append(f"timezone->{tz}")
+        if tz and self.pending("timezone"):
+            self.begin("timezone")
+            rcs = []
+            rcs.append(run(f"sudo timedatectl set-timezone {tz}")[0])
+            ok &= self._record("timezone", f"timezone->{tz}", rcs, msgs)
         # locale
         loc = self.cfg.get("locale")
-        if loc:
+        if loc and self.pending("locale"):
+            self.begin("locale")
+            rcs = []
             # enable and set default locale
-            run(f"sudo sed -i 's/^#\s*{loc}/{loc}/' /etc/locale.gen")
-            run("sudo locale-gen")
-            run(f"sudo update-locale LANG={loc}")
-            msgs.append(f"locale->{loc}")
+            rcs.append(run(f"sudo sed -i 's/^#\s*{loc}/{loc}/' /etc/locale.gen")[0])
+            rcs.append(self.stream("sudo locale-gen")[0])
+            rcs.append(run(f"sudo update-locale LANG={loc}")[0])
+            ok &= self._record("locale", f"locale->{loc}", rcs, msgs)
         # keyboard layout (console-setup)
         kb = self.cfg.get("keyboard_layout")
-        if kb:
-            run(f"""sudo bash -lc 'debconf-set-selections <<EOF
+        if kb and self.pending("keyboard"):
+            self.begin("keyboard")
+            rcs = []
+            rcs.append(run(f"""sudo bash -lc 'debconf-set-selections <<EOF
 keyboard-configuration keyboard-configuration/layoutcode string {kb}
-EOF'""")
-            run("sudo dpkg-reconfigure -f noninteractive keyboard-configuration", check=False)
-            msgs.append(f"keyboard->{kb}")
+EOF'""")[0])
+            rcs.append(run("sudo dpkg-reconfigure -f noninteractive keyboard-configuration")[0])
+            ok &= self._record("keyboard", f"keyboard->{kb}", rcs, msgs)
         # gpu_mem (bookworm uses /boot/firmware/config.txt)
         gm = self.cfg.get("gpu_mem")
-        if gm:
-            run("sudo sed -i '/^gpu_mem=/d' /boot/firmware/config.txt 2>/dev/null || true")
-            run(f"echo 'gpu_mem={gm}' | sudo tee -a /boot/firmware/config.txt >/dev/null", check=False)
-            msgs.append(f"gpu_mem->{gm}")
-        return True, "; ".join(msgs) if msgs else "no changes"
+        if gm and self.pending("gpu_mem"):
+            self.begin("gpu_mem")
+            rcs = []
+            rcs.append(run("sudo sed -i '/^gpu_mem=/d' /boot/firmware/config.txt 2>/dev/null || true")[0])
+            rcs.append(run(f"echo 'gpu_mem={gm}' | sudo tee -a /boot/firmware/config.txt >/dev/null")[0])
+            ok &= self._record("gpu_mem", f"gpu_mem->{gm}", rcs, msgs)
+        return ok, "; ".join(msgs) if msgs else "no changes"
+
+    def _record(self, unit, label, rcs, msgs) -> bool:
+        # only a step whose commands all succeeded is checkpointed, so --resume retries the rest
+        if any(rcs):
+            self.fail(unit)
+            msgs.append(f"{label} failed")
+            return False
+        self.finish(unit)
+        msgs.append(label)
+        return True
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Tuple, Set, List
+from typing import Tuple, List
 import shutil
 from .base import Task
 from ..utils import run, which
@@ -7,21 +7,25 @@ from ..utils import run, which
 class VSCodeExtensions(Task):
     name = "vscode_extensions"
 
-    def __init__(self, cfg: dict, tags: Set[str] | None = None):
-        super().__init__(cfg, tags)
-        self.cfg = cfg
-        self.code_cmd = which("code") or which("code-oss") or which("codium")
+    @property
+    def code_cmd(self) -> str | None:
+        # Looked up lazily so a CLI installed earlier in the run (apt, Pi-Apps) is found.
+        if not self.has_observed("code_cmd"):
+            self.observe("code_cmd", which("code") or which("code-oss") or which("codium"))
+        return self.observed("code_cmd")
 
     def _desired(self):
         return self.cfg.get("vscode", {}).get("extensions", {})
 
     def _installed(self) -> List[str]:
+        if self.has_observed("installed"):
+            return self.observed("installed")
         if not self.code_cmd:
             return []
         rc, out, err = run(f"{self.code_cmd} --list-extensions")
         if rc != 0:
             return []
-        return [line.strip() for line in out.splitlines() if line.strip()]
+        return self.observe("installed", [line.strip() for line in out.splitlines() if line.strip()])
 
     def check(self) -> Tuple[bool, bool, str]:
         desired = self._desired()
@@ -53,17 +57,27 @@ class VSCodeExtensions(Task):
         ok = True
         msgs = []
         for ext in sorted(present - current):
-            rc, out, err = run(f"{self.code_cmd} --install-extension {ext}")
+            if not self.pending(f"install:{ext}"):
+                continue
+            self.begin(f"install:{ext}")
+            rc, out, err = self.stream(f"{self.code_cmd} --install-extension {ext}")
             if rc != 0:
+                self.fail(f"install:{ext}")
                 ok = False
                 msgs.append(f"{ext}: install failed: {err or out}")
             else:
+                self.finish(f"install:{ext}")
                 msgs.append(f"{ext}: installed")
         for ext in sorted(current & absent):
+            if not self.pending(f"uninstall:{ext}"):
+                continue
+            self.begin(f"uninstall:{ext}")
             rc, out, err = run(f"{self.code_cmd} --uninstall-extension {ext}")
             if rc != 0:
+                self.fail(f"uninstall:{ext}")
                 ok = False
                 msgs.append(f"{ext}: uninstall failed: {err or out}")
             else:
+                self.finish(f"uninstall:{ext}")
                 msgs.append(f"{ext}: uninstalled")
         return ok, "; ".join(msgs) if msgs else "no changes"
@@ -1,6 +1,7 @@
 from __future__ import annotations
-import os, subprocess, shlex, hashlib, pathlib, stat
-from typing import Tuple
+import os, subprocess, shlex, hashlib, pathlib, stat, threading, codecs, re
+from collections import deque
+from typing import Callable, Tuple
 
 def run(cmd: str, check: bool = False, env: dict | None = None) -> Tuple[int, str, str]:
     proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env={**os.environ, **(env or {})})
@@ -9,6 +10,105 @@ def run(cmd: str, check: bool = False, env: dict | None = None) -> Tuple[int, st
         raise RuntimeError(f"Command failed ({proc.returncode}): {cmd}\n{err}")
     return proc.returncode, out.strip(), err.strip()
 
+def run_stream(cmd: str, on_line: Callable[[str], None] | None = None, log_path: str | None = None,
+               tail: int = 200, max_line: int = 4096, env: dict | None = None) -> Tuple[int, str, str]:
+    """Like run(), but reads output incrementally instead of buffering it all.
+
+    Output is read in fixed-size chunks and split on newlines and carriage
+    returns (progress bars), with lines longer than `max_line` cut into pieces,
+    so only the last `tail` lines of stdout/stderr are ever held in memory.
+    Each line is passed to `on_line` as it arrives and, if `log_path` is set,
+    the full output is appended to that file. If the caller is interrupted the
+    child is terminated before the exception propagates.
+    """
+    out_tail: deque = deque(maxlen=tail)
+    err_tail: deque = deque(maxlen=tail)
+    lock = threading.Lock()
+    # mutable so pump() sees the callback being dropped and the log being closed
+    sinks = {"log": None, "on_line": on_line}
+    # open the log first: failing here must not leave a child running with nobody reading it
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        sinks["log"] = open(log_path, "a")
+        sinks["log"].write(f"$ {cmd}\n")
+    try:
+        proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                env={**os.environ, **(env or {})})
+    except Exception:
+        if sinks["log"]:
+            sinks["log"].close()
+        raise
+
+    def emit(line, buf):
+        with lock:
+            if sinks["log"]:
+                sinks["log"].write(line + "\n")
+            # blank lines go to the log only
+            if not line:
+                return
+            buf.append(line)
+            if sinks["on_line"]:
+                try:
+                    sinks["on_line"](line)
+                except Exception:
+                    # e.g. the terminal went away; stop reporting but keep draining the pipes
+                    sinks["on_line"] = None
+
+    def emit_capped(line, buf):
+        if not line:
+            emit(line, buf)
+        for i in range(0, len(line), max_line):
+            emit(line[i:i + max_line], buf)
+
+    def pump(stream, buf):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        while True:
+            chunk = os.read(stream.fileno(), 65536)
+            if not chunk:
+                break
+            pending += decoder.decode(chunk)
+            # hold back a trailing \r in case the next chunk starts with the \n of a \r\n
+            hold = "\r" if pending.endswith("\r") else ""
+            *lines, pending = re.split(r"\r\n|\r|\n", pending[:len(pending) - len(hold)])
+            for line in lines:
+                emit_capped(line, buf)
+            while len(pending) > max_line:
+                emit(pending[:max_line], buf)
+                pending = pending[max_line:]
+            pending += hold
+        pending += decoder.decode(b"", final=True)
+        # only a held-back \r can still be in pending; it ends the last line
+        if pending.endswith("\r"):
+            emit_capped(pending[:-1], buf)
+        elif pending:
+            emit_capped(pending, buf)
+
+    # stderr drains on its own thread so neither pipe can fill up and block the child
+    t = threading.Thread(target=pump, args=(proc.stderr, err_tail), daemon=True)
+    t.start()
+    try:
+        pump(proc.stdout, out_tail)
+        t.join()
+        proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        t.join(timeout=5)
+        with lock:
+            if sinks["log"]:
+                sinks["log"].close()
+                sinks["log"] = None
+        proc.stdout.close()
+        if not t.is_alive():
+            proc.stderr.close()
+    return proc.returncode, "\n".join(out_tail).strip(), "\n".join(err_tail).strip()
+
 def is_root() -> bool:
     return os.geteuid() == 0
 
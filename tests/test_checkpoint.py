@@ -0,0 +1,114 @@
+import pytest
+import yaml
+from typer.testing import CliRunner
+
+from rpios_setup.checkpoint import Checkpoint
+from rpios_setup.cli import app
+from rpios_setup.engine import Planner
+from rpios_setup.tasks.base import Task
+
+
+def test_begin_done_in_flight(tmp_path):
+    cp = Checkpoint(str(tmp_path / "cp.json"), "fp")
+    cp.begin("t", "a")
+    assert cp.in_flight("t") == "a"
+    assert not cp.is_done("t", "a")
+    cp.done("t", "a")
+    assert cp.in_flight("t") is None
+    assert cp.is_done("t", "a")
+    assert not cp.task_done("t")
+    cp.complete_task("t")
+    assert cp.task_done("t")
+
+
+def test_load_matching_fingerprint_resumes(tmp_path):
+    path = str(tmp_path / "state" / "cp.json")
+    cp = Checkpoint(path, "fp")
+    cp.done("t", "a")
+    cp.begin("t", "b")
+    again = Checkpoint.load(path, "fp")
+    assert again.resumed
+    assert again.is_done("t", "a")
+    assert again.in_flight("t") == "b"
+
+
+def test_abort_clears_in_flight_but_not_done(tmp_path):
+    cp = Checkpoint(str(tmp_path / "cp.json"), "fp")
+    cp.begin("t", "a")
+    cp.abort("t")
+    assert cp.in_flight("t") is None
+    assert not cp.is_done("t", "a")
+    assert Checkpoint.load(cp.path, "fp").in_flight("t") is None
+
+
+def test_failed_unit_is_not_reported_as_interrupted(tmp_path):
+    class Flaky(Task):
+        name = "flaky"
+
+        def apply(self):
+            self.begin("step")
+            self.fail("step")
+            return False, "step failed"
+
+    task = Flaky({})
+    task.checkpoint = Checkpoint(str(tmp_path / "cp.json"), "fp")
+    task.apply()
+    assert task.interrupted() is None
+    assert task.pending("step")
+
+
+@pytest.mark.parametrize("content", ["[]", "{\"tasks\": []}", "{\"tasks\": {\"t\": 1}}", "{\"fingerprint\": \"fp\""])
+def test_load_malformed_starts_fresh(tmp_path, content):
+    path = tmp_path / "cp.json"
+    path.write_text(content)
+    cp = Checkpoint.load(str(path), "fp")
+    assert not cp.resumed
+    assert cp.tasks == {}
+
+
+def test_load_mismatched_or_missing_starts_fresh(tmp_path):
+    path = str(tmp_path / "cp.json")
+    Checkpoint(path, "fp").done("t", "a")
+    other = Checkpoint.load(path, "changed")
+    assert not other.resumed
+    assert not other.is_done("t", "a")
+    assert not Checkpoint.load(str(tmp_path / "nope.json"), "fp").resumed
+
+
+def test_clear_removes_file(tmp_path):
+    path = tmp_path / "cp.json"
+    cp = Checkpoint(str(path), "fp")
+    cp.done("t", "a")
+    assert path.exists()
+    cp.clear()
+    assert not path.exists()
+    assert not cp.is_done("t", "a")
+    cp.clear()
+
+
+def test_resume_redoes_in_flight_file(tmp_path):
+    src = tmp_path / "src.txt"
+    src.write_text("FULL CONTENT\n")
+    dest = tmp_path / "out" / "dest.txt"
+    dest.parent.mkdir()
+    dest.write_text("PART")
+    config = tmp_path / "config.yml"
+    config.write_text(yaml.safe_dump({"files": [{"src": str(src), "dest": str(dest)}]}))
+    state = tmp_path / "cp.json"
+    # a previous run backed up the original, then died while copying over dest
+    (tmp_path / "out" / "dest.txt.bak").write_text("ORIGINAL")
+    cp = Checkpoint(str(state), Planner.from_config(str(config)).fingerprint())
+    cp.done("piapps_present", "app:Audacity")
+    cp.done("file_present", f"backup:{dest}")
+    cp.begin("file_present", f"file:{dest}")
+
+    result = CliRunner().invoke(app, ["apply", "-c", str(config), "-t", "files",
+                                      "--resume", "--state-file", str(state)])
+    assert result.exit_code == 0, result.output
+    assert "redoing interrupted" in result.output
+    assert dest.read_text() == "FULL CONTENT\n"
+    assert (tmp_path / "out" / "dest.txt.bak").read_text() == "ORIGINAL"
+    # the --tags run must not throw away progress of tasks it never visited
+    left = Checkpoint.load(str(state), cp.fingerprint)
+    assert left.task_done("file_present")
+    assert left.is_done("piapps_present", "app:Audacity")
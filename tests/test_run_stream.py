@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+import pytest
+
+from rpios_setup.utils import run_stream
+
+
+def test_exit_code_and_tail_truncation():
+    seen = []
+    rc, out, err = run_stream("seq 1 1000; exit 3", on_line=seen.append, tail=3)
+    assert rc == 3
+    assert out == "998\n999\n1000"
+    assert err == ""
+    assert len(seen) == 1000
+
+
+def test_stdout_and_stderr_are_both_captured_and_forwarded():
+    seen = []
+    rc, out, err = run_stream("echo out1; echo err1 >&2; echo out2; echo err2 >&2", on_line=seen.append)
+    assert rc == 0
+    assert out == "out1\nout2"
+    assert err == "err1\nerr2"
+    assert sorted(seen) == ["err1", "err2", "out1", "out2"]
+    # order within each stream is preserved
+    assert seen.index("out1") < seen.index("out2")
+    assert seen.index("err1") < seen.index("err2")
+
+
+def test_log_file_gets_full_output(tmp_path):
+    log = tmp_path / "logs" / "task.log"
+    run_stream("seq 1 500", log_path=str(log), tail=2)
+    lines = log.read_text().splitlines()
+    assert lines[0] == "$ seq 1 500"
+    assert lines[1:] == [str(i) for i in range(1, 501)]
+
+
+def test_carriage_returns_and_long_lines_are_bounded():
+    rc, out, _ = run_stream("printf '10%%\\r50%%\\r100%%\\n'; head -c 10000 /dev/zero | tr '\\0' x",
+                            tail=10, max_line=4096)
+    lines = out.splitlines()
+    assert lines[:3] == ["10%", "50%", "100%"]
+    assert [len(l) for l in lines[3:]] == [4096, 4096, 1808]
+
+
+def test_failing_callback_does_not_stop_draining():
+    def boom(line):
+        raise OSError("terminal gone")
+
+    rc, out, err = run_stream("seq 1 100000 >&2; echo done", on_line=boom, tail=1)
+    assert rc == 0
+    assert out == "done"
+    assert err == "100000"
+
+
+def test_long_terminated_lines_are_capped():
+    rc, out, _ = run_stream("head -c 10000 /dev/zero | tr '\\0' x; echo", max_line=4096)
+    assert [len(l) for l in out.splitlines()] == [4096, 4096, 1808]
+
+
+def test_log_keeps_blank_lines(tmp_path):
+    log = tmp_path / "task.log"
+    seen = []
+    rc, out, _ = run_stream("printf 'a\\n\\nb\\r\\n'", on_line=seen.append, log_path=str(log))
+    assert log.read_text().splitlines()[1:] == ["a", "", "b"]
+    assert seen == ["a", "b"]
+    assert out == "a\nb"
+
+
+def test_bad_log_path_does_not_start_child(tmp_path):
+    marker = tmp_path / "started"
+    with pytest.raises(OSError):
+        run_stream(f"touch {marker}", log_path="/proc/nope/x.log")
+    assert not marker.exists()
+
+
+def test_interrupt_terminates_child(tmp_path, monkeypatch):
+    pidfile = tmp_path / "pid"
+    real_read = os.read
+
+    def interrupted_read(fd, n):
+        # simulate Ctrl-C arriving while the main thread pumps stdout
+        # (Popen's own exec-error pipe read uses a different size)
+        if n == 65536 and threading.current_thread() is threading.main_thread():
+            deadline = time.monotonic() + 10
+            while not pidfile.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            raise KeyboardInterrupt
+        return real_read(fd, n)
+
+    monkeypatch.setattr(os, "read", interrupted_read)
+    with pytest.raises(KeyboardInterrupt):
+        run_stream(f"echo $$ > {pidfile}.tmp; mv {pidfile}.tmp {pidfile}; exec sleep 30")
+    monkeypatch.undo()
+    pid = int(pidfile.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
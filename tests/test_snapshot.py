@@ -0,0 +1,51 @@
+from rpios_setup.tasks.base import Snapshot, Task
+
+
+class Probe(Task):
+    name = "probe"
+
+    def check(self):
+        self.observe("seen", ["a"])
+        return False, True, "missing: a"
+
+
+class Installer(Task):
+    name = "installer"
+    invalidates = {"probe"}
+
+
+def test_record_and_get():
+    s = Snapshot()
+    assert s.record("t", "k", [1]) == [1]
+    assert s.get("t", "k") == [1]
+    assert s.get("t", "other", "dflt") == "dflt"
+    assert s.get("nobody", "k") is None
+
+
+def test_invalidate_owner_and_all():
+    s = Snapshot()
+    s.record("a", "k", 1)
+    s.record("b", "k", 2)
+    s.invalidate("a")
+    assert s.get("a", "k") is None
+    assert s.get("b", "k") == 2
+    s.invalidate()
+    assert s.get("b", "k") is None
+
+
+def test_has_observed_distinguishes_none():
+    t = Probe({})
+    assert not t.has_observed("x")
+    t.observe("x", None)
+    assert t.has_observed("x")
+
+
+def test_invalidates_clears_dependent_task_when_checks_run_first():
+    s = Snapshot()
+    probe, installer = Probe({}, snapshot=s), Installer({}, snapshot=s)
+    probe.check()
+    installer.observe("missing", ["pkg"])
+    assert probe.observed("seen") == ["a"]
+    installer.invalidate()
+    assert not installer.has_observed("missing")
+    assert not probe.has_observed("seen")